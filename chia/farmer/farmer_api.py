@@ -25,8 +25,6 @@ from chia.protocols.pool_protocol import (
 )
 from chia.protocols.protocol_message_types import ProtocolMessageTypes
 from chia.server.outbound_message import NodeType, make_msg
-from chia.server.server import ssl_context_for_root
-from chia.ssl.create_ssl import get_mozilla_ca_crt
 from chia.types.blockchain_format.pool_target import PoolTarget
 from chia.types.blockchain_format.proof_of_space import ProofOfSpace
 from chia.util.api_decorators import api_request, peer_required
@@ -236,12 +234,14 @@ class FarmerAPI:
                 try:
                     if True:
                         from chia.farmer.og_pooling import pool_api_client
-                        pool_response: Dict = await pool_api_client.post_partial(
-                            f"{pool_url}/partial",
-                            json=post_partial_request.to_json_dict(),
-                            ssl=ssl_context_for_root(get_mozilla_ca_crt(), log=self.farmer.log),
-                            headers={"User-Agent": f"Chia Blockchain v.{__version__}"},
-                        )
+                        async with aiohttp.ClientSession(timeout=pool_api_client.partial_timeout) as session:
+                            pool_response: Dict = await pool_api_client.post_partial(
+                                session,
+                                f"{pool_url}/partial",
+                                json=post_partial_request.to_json_dict(),
+                                ssl=pool_api_client.cached_ssl_context(),
+                                headers={"User-Agent": f"Chia Blockchain v.{__version__}"},
+                            )
                         if True:
                             if True:
                                 self.farmer.log.info(f"Pool response: {pool_response}")
@@ -1,14 +1,18 @@
 import asyncio
 import logging
+import random
 import time
+from functools import lru_cache
 from logging import Logger
-from typing import Any, Optional, Dict
+from ssl import SSLContext
+from typing import Any, Optional, Dict, cast
 
-from aiohttp import ClientSession, ClientTimeout, ClientError, ClientConnectionError
+import orjson
+from aiohttp import ClientSession, ClientTimeout, ClientError, ClientConnectionError, TCPConnector
 from aiohttp.typedefs import StrOrURL
 
 from chia import __version__
-from chia.farmer.og_pooling.pool_protocol import SubmitPartialOG
+from chia.farmer.og_pooling.pool_protocol import SubmitPartialOG, SubmitResponseOG
 from chia.server.server import ssl_context_for_root
 from chia.ssl.create_ssl import get_mozilla_ca_crt
 
@@ -17,22 +21,45 @@ timeout = ClientTimeout(total=30)
 partial_timeout = ClientTimeout(total=30, sock_read=8.5, sock_connect=8.5)
 partial_log = logging.getLogger("partial_post")
 
+PARTIAL_RETRY_BASE_DELAY = 0.5
+PARTIAL_RETRY_JITTER = 0.5
+PARTIAL_MAX_ATTEMPTS = 4
 
-async def post_partial(url: StrOrURL, *, data: Any = None, **kwargs: Any) -> Dict:
-    ttl = time.time() + 23
+
+@lru_cache(maxsize=1)
+def cached_ssl_context() -> SSLContext:
+    # Loading the Mozilla CA bundle is expensive, share one context across all pool requests
+    return ssl_context_for_root(get_mozilla_ca_crt(), log=partial_log)
+
+
+async def post_partial(session: ClientSession, url: StrOrURL, *, data: Any = None, json: Any = None,
+                       headers: Optional[Dict[str, str]] = None, **kwargs: Any) -> Dict:
+    if json is not None:
+        data = orjson.dumps(json)
+        headers = dict(headers) if headers is not None else {}
+        headers["Content-Type"] = "application/json"
+    ttl = time.monotonic() + 23
     last_error: Optional[ClientError] = None
-    while time.time() < ttl:
+    attempt = 0
+    while time.monotonic() < ttl:
         try:
-            async with ClientSession(timeout=partial_timeout) as client:
-                async with client.post(url, data=data, **kwargs) as res:
-                    if res.ok:
-                        return await res.json()
-                    else:
-                        last_error = ClientConnectionError(f"Partial submit answer error: {url}, {res.status}")
-                        break
+            async with session.post(url, data=data, headers=headers, **kwargs) as res:
+                if res.ok:
+                    return orjson.loads(await res.read())
+                else:
+                    last_error = ClientConnectionError(f"Partial submit answer error: {url}, {res.status}")
+                    break
         except ClientError as e:
             partial_log.error(f"Partial submit error: {e}")
             last_error = e
+        # Exponential backoff with jitter, never sleeping past the partial's ttl
+        delay = PARTIAL_RETRY_BASE_DELAY * (2 ** attempt) * (1 + random.random() * PARTIAL_RETRY_JITTER)
+        delay = min(delay, ttl - time.monotonic())
+        attempt += 1
+        if attempt >= PARTIAL_MAX_ATTEMPTS:
+            break
+        if delay > 0:
+            await asyncio.sleep(delay)
     raise last_error if last_error else ClientConnectionError(f"No partial submitted to {url}")
 
 
@@ -42,17 +69,48 @@ class PoolApiClient:
     def __init__(self, base_url: str, log: Logger) -> None:
         self.base_url = base_url
         self.log = log
+        self._ssl_ctx: Optional[SSLContext] = None
+        self._session: Optional[ClientSession] = None
+        self._session_lock = asyncio.Lock()
+        self._closed = False
+
+    async def _get_session(self) -> ClientSession:
+        # A single long-lived session keeps the connection to the pool alive between partials
+        async with self._session_lock:
+            if self._closed:
+                raise ClientConnectionError(f"Pool client for {self.base_url} is closed")
+            if self._session is None or self._session.closed:
+                if self._ssl_ctx is None:
+                    self._ssl_ctx = cached_ssl_context()
+                self._session = ClientSession(
+                    timeout=partial_timeout,
+                    connector=TCPConnector(
+                        limit=8,
+                        limit_per_host=4,
+                        ttl_dns_cache=600,
+                        keepalive_timeout=60,
+                        ssl=self._ssl_ctx,
+                    ),
+                )
+            return self._session
+
+    async def close(self) -> None:
+        async with self._session_lock:
+            self._closed = True
+            if self._session is not None:
+                await self._session.close()
+                self._session = None
 
     async def get_pool_info(self):
-        async with ClientSession(timeout=timeout) as client:
-            async with client.get(f"{self.base_url}/og/pool_info",
-                                  ssl=ssl_context_for_root(get_mozilla_ca_crt(), log=self.log),
-                                  ) as res:
-                return await res.json()
-
-    async def submit_partial(self, submit_partial: SubmitPartialOG) -> Dict:
-        return await post_partial(f"{self.base_url}/og/partial",
-                                  json=submit_partial.to_json_dict(),
-                                  ssl=ssl_context_for_root(get_mozilla_ca_crt(), log=self.log),
-                                  headers={"User-Agent": f"Chia Blockchain v.{__version__}"},
-                                  )
+        session = await self._get_session()
+        async with session.get(f"{self.base_url}/og/pool_info", timeout=timeout) as res:
+            return orjson.loads(await res.read())
+
+    async def submit_partial(self, submit_partial: SubmitPartialOG) -> SubmitResponseOG:
+        session = await self._get_session()
+        response = await post_partial(session,
+                                      f"{self.base_url}/og/partial",
+                                      json=submit_partial.to_json_dict(),
+                                      headers={"User-Agent": f"Chia Blockchain v.{__version__}"},
+                                      )
+        return cast(SubmitResponseOG, response)
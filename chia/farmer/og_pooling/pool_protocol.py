@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from typing import Optional
 
 from blspy import G2Element
+from typing_extensions import TypedDict
 
 from chia.types.blockchain_format.proof_of_space import ProofOfSpace
 from chia.types.blockchain_format.sized_bytes import bytes32
@@ -27,3 +28,10 @@ class PartialPayloadOG(Streamable):
 class SubmitPartialOG(Streamable):
     payload: PartialPayloadOG
     aggregate_signature: G2Element  # Sig of partial by plot key and pool key
+
+
+class SubmitResponseOG(TypedDict, total=False):
+    new_difficulty: int
+    partial_target_time: int
+    error_code: int
+    error_message: str
@@ -1,19 +1,18 @@
 import asyncio
 import logging
 import time
-from typing import Optional, Dict, Tuple, Any
+from typing import Optional, Dict, Tuple, Any, List
 
-from blspy import G1Element, G2Element, AugSchemeMPL
+from blspy import G1Element, G2Element, AugSchemeMPL, PrivateKey
 
 import chia.server.ws_connection as ws
 from chia.consensus.pot_iterations import calculate_sp_interval_iters, calculate_iterations_quality
 from chia.farmer.og_pooling.pool_api_client import PoolApiClient
-from chia.farmer.og_pooling.pool_protocol import PartialPayloadOG, SubmitPartialOG
+from chia.farmer.og_pooling.pool_protocol import PartialPayloadOG, SubmitPartialOG, SubmitResponseOG
 from chia.protocols import farmer_protocol, harvester_protocol
 from chia.types.blockchain_format.proof_of_space import ProofOfSpace
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.util.bech32m import encode_puzzle_hash
-from chia.util.byte_types import hexstr_to_bytes
 from chia.util.config import load_config, save_config
 from chia.util.ints import uint64, uint32
 
@@ -21,6 +20,8 @@ log = logging.getLogger("og_pooling")
 
 DEFAULT_POOL_URL: str = "https://pool.sweetchia.com"
 POOL_SUB_SLOT_ITERS: uint64 = uint64(37600000000)
+DIFFICULTY_ADJUST_INTERVAL: float = 60.0
+HARVESTER_STALE_TIMEOUT: float = 120.0
 
 
 class PoolWorker:
@@ -52,35 +53,44 @@ class PoolWorker:
         self.pool_enabled = og_config.get("enabled", True)
         self.pool_url = og_config.get("pool_url", DEFAULT_POOL_URL)
         self.pool_payout_address: str = str(og_config.get("pool_payout_address", "")).strip()
+        self._address_prefix: Optional[str] = None
 
         self.pool_target: Optional[bytes32] = None
         self.pool_target_encoded: Optional[str] = None
 
         self.pool_sub_slot_iters = POOL_SUB_SLOT_ITERS
         self.iters_limit = calculate_sp_interval_iters(self.farmer.constants, self.pool_sub_slot_iters)
+        self._difficulty_constant_factor = self.farmer.constants.DIFFICULTY_CONSTANT_FACTOR
         self.pool_difficulty: uint64 = uint64(1)
         self.pool_minimum_difficulty: uint64 = uint64(1)
         self.pool_partial_target_time = 5 * 60
-        self.last_partial_submit_time: float = time.time()
+        self.last_partial_submit_time: float = time.monotonic()
         self.pool_client: Optional[PoolApiClient] = None
         self.adjust_difficulty_task: Optional[asyncio.Task] = None
+        self._stop_event = asyncio.Event()
         self.total_plots = 0
-        self.harvester_plots: Dict = {}
+        self.harvester_plots: Dict[bytes32, int] = {}
+        self.harvester_last_seen: Dict[bytes32, float] = {}
+        self._sk_by_g1: Dict[bytes, PrivateKey] = {}
+        self._sk_by_g1_source: Optional[List[PrivateKey]] = None
 
     @property
     def _is_pooling_enabled(self):
         return self.pool_enabled and \
                self.pool_url is not None
 
-    @property
-    def _is_pool_connected(self):
-        return self.pool_client is not None
-
     @property
     def _shut_down(self):
         # noinspection PyProtectedMember
         return self.farmer._shut_down
 
+    def _refresh_sk_by_g1(self):
+        # Farmer.setup_keys replaces the key list, so an identity check is enough to detect changes
+        private_keys = self.farmer.get_private_keys()
+        if private_keys is not self._sk_by_g1_source:
+            self._sk_by_g1 = {bytes(sk.get_g1()): sk for sk in private_keys}
+            self._sk_by_g1_source = private_keys
+
     async def _connect_to_pool(self):
         pool_info: Dict = {}
         has_pool_info = False
@@ -96,6 +106,7 @@ class PoolWorker:
                 await asyncio.sleep(5)
 
         if self._shut_down:
+            await client.close()
             return
 
         pool_name = pool_info["name"]
@@ -105,29 +116,39 @@ class PoolWorker:
         self.pool_partial_target_time = pool_info["partial_target_time"]
 
         self.pool_target = bytes32.from_hexstr(pool_info["target_puzzle_hash"])
-        address_prefix = self.config["network_overrides"]["config"][self.config["selected_network"]]["address_prefix"]
-        self.pool_target_encoded = encode_puzzle_hash(self.pool_target, address_prefix)
+        if self._address_prefix is None:
+            selected_network = self.config["selected_network"]
+            self._address_prefix = self.config["network_overrides"]["config"][selected_network]["address_prefix"]
+        self.pool_target_encoded = encode_puzzle_hash(self.pool_target, self._address_prefix)
 
-        if self.farmer.pool_target is not self.pool_target or \
-                self.farmer.pool_target_encoded is not self.pool_target_encoded:
+        if self.farmer.pool_target != self.pool_target or \
+                self.farmer.pool_target_encoded != self.pool_target_encoded:
             # self.farmer.set_reward_targets(farmer_target_encoded=None, pool_target_encoded=pool_target_encoded)
             self.farmer.pool_target = self.pool_target
             self.farmer.pool_target_encoded = self.pool_target_encoded
+        self._refresh_sk_by_g1()
         self.pool_client = client
 
         self.log.info(f"Pool info: {pool_name}, cur_diff={self.pool_difficulty}, "
                       f"target_time={self.pool_partial_target_time}, "
                       f"target_hash={self.pool_target_encoded}")
 
+    def _prune_stale_harvesters(self):
+        cutoff = time.monotonic() - HARVESTER_STALE_TIMEOUT
+        for node_id in [node_id for node_id, seen in self.harvester_last_seen.items() if seen < cutoff]:
+            self.total_plots -= self.harvester_plots.pop(node_id, 0)
+            del self.harvester_last_seen[node_id]
+
     async def _initialize_and_adjust_difficulty_task(self):
-        last_tick = time.time()
         while not self._shut_down:
-            await asyncio.sleep(1)
-            now = time.time()
-            if now - last_tick < 60:
-                continue
-            last_tick = now
-            elapsed = now - self.last_partial_submit_time
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=DIFFICULTY_ADJUST_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            if self._shut_down or self._stop_event.is_set():
+                break
+            self._prune_stale_harvesters()
+            elapsed = time.monotonic() - self.last_partial_submit_time
             if elapsed < self.pool_partial_target_time or self.pool_partial_target_time < 1:
                 continue
             missing_partials = elapsed // self.pool_partial_target_time
@@ -152,30 +173,39 @@ class PoolWorker:
             self.log.info(f"Legacy pooling disabled")
 
     async def close(self):
+        self._stop_event.set()
         if self.adjust_difficulty_task is not None:
-            await self.adjust_difficulty_task
+            self.adjust_difficulty_task.cancel()
+            try:
+                await self.adjust_difficulty_task
+            except asyncio.CancelledError:
+                pass
+            self.adjust_difficulty_task = None
+        if self.pool_client is not None:
+            await self.pool_client.close()
         self.pool_client = None
 
     def new_signage_point(self, new_signage_point: farmer_protocol.NewSignagePoint) -> Tuple[uint64, uint64]:
-        if self._is_pool_connected:
-            self.total_plots = sum(self.harvester_plots.values())
-            self.harvester_plots = {}
+        if self.pool_client is not None:
             return uint64(self.pool_difficulty), self.pool_sub_slot_iters
         else:
             return new_signage_point.difficulty, new_signage_point.sub_slot_iters
 
     def farming_info(self, request: farmer_protocol.FarmingInfo, peer: ws.WSChiaConnection):
-        if self._is_pool_connected:
-            self.harvester_plots[peer.peer_node_id] = request.total_plots
+        if self.pool_client is not None and not self._shut_down:
+            node_id = peer.peer_node_id
+            self.total_plots += request.total_plots - self.harvester_plots.get(node_id, 0)
+            self.harvester_plots[node_id] = request.total_plots
+            self.harvester_last_seen[node_id] = time.monotonic()
 
     def get_pool_target(self) -> bytes32:
-        if self._is_pool_connected:
+        if self.pool_client is not None:
             return self.pool_target
         else:
             return self.farmer.pool_target
 
     def get_pool_target_encoded(self) -> str:
-        if self._is_pool_connected:
+        if self.pool_client is not None:
             return self.pool_target_encoded
         else:
             return self.farmer.pool_target_encoded
@@ -187,28 +217,29 @@ class PoolWorker:
             pool_public_key: G1Element,
             computed_quality_string: bytes32
     ):
-        if not self._is_pool_connected:
+        if self.pool_client is None or self._shut_down:
             return
 
+        pool_difficulty = self.pool_difficulty
         required_iters = calculate_iterations_quality(
-            self.farmer.constants.DIFFICULTY_CONSTANT_FACTOR,
+            self._difficulty_constant_factor,
             computed_quality_string,
             new_proof_of_space.proof.size,
-            self.pool_difficulty,
+            pool_difficulty,
             new_proof_of_space.sp_hash,
         )
         if required_iters >= self.iters_limit:
             self.log.info(
-                f"Proof of space not good enough for pool difficulty of {self.pool_difficulty}"
+                f"Proof of space not good enough for pool difficulty of {pool_difficulty}"
             )
             return
 
         # Submit partial to pool
-        payout_address = self.pool_payout_address if self.pool_payout_address else self.farmer.farmer_target_encoded
+        payout_address = self.pool_payout_address or self.farmer.farmer_target_encoded
         is_eos = new_proof_of_space.signage_point_index == 0
         payload = PartialPayloadOG(
             self.farmer.server.node_id,
-            self.pool_difficulty,
+            pool_difficulty,
             new_proof_of_space.proof,
             new_proof_of_space.sp_hash,
             is_eos,
@@ -225,33 +256,42 @@ class PoolWorker:
             new_proof_of_space.sp_hash,
             [m_to_sign],
         )
+        # The authentication signature does not depend on the harvester, sign it while we wait for the response
+        # BLS signing and verification are CPU bound, run them in the default executor to keep the event loop
+        # responsive. Aggregating two signatures is cheaper than the executor round-trip, so it stays inline.
+        loop = asyncio.get_running_loop()
+        pool_sk = self.farmer.pool_sks_map[bytes(pool_public_key)]
+        auth_sig_future = loop.run_in_executor(None, AugSchemeMPL.sign, pool_sk, m_to_sign)
         sign_response: Any = await peer.request_signatures(request)
         if not isinstance(sign_response, harvester_protocol.RespondSignatures):
             self.log.error(f"Invalid response from harvester: {sign_response}")
+            auth_sig_future.cancel()
             return
 
         assert len(sign_response.message_signatures) == 1
 
-        plot_signature: Optional[G2Element] = None
-        for sk in self.farmer.get_private_keys():
-            pk = sk.get_g1()
-            if pk == sign_response.farmer_pk:
-                agg_pk = ProofOfSpace.generate_plot_public_key(sign_response.local_pk, pk)
-                assert agg_pk == new_proof_of_space.proof.plot_public_key
-                sig_farmer = AugSchemeMPL.sign(sk, m_to_sign, agg_pk)
-                plot_signature = AugSchemeMPL.aggregate([sig_farmer, sign_response.message_signatures[0][1]])
-                assert AugSchemeMPL.verify(agg_pk, m_to_sign, plot_signature)
-        pool_sk = self.farmer.pool_sks_map[bytes(pool_public_key)]
-        authentication_signature = AugSchemeMPL.sign(pool_sk, m_to_sign)
+        self._refresh_sk_by_g1()
+        sk: Optional[PrivateKey] = self._sk_by_g1.get(bytes(sign_response.farmer_pk))
+        if sk is None:
+            self.log.error(f"Farmer private key not found for farmer public key {sign_response.farmer_pk}")
+            auth_sig_future.cancel()
+            return
+        agg_pk = ProofOfSpace.generate_plot_public_key(sign_response.local_pk, sign_response.farmer_pk)
+        sig_farmer: G2Element = await loop.run_in_executor(None, AugSchemeMPL.sign, sk, m_to_sign, agg_pk)
+        plot_signature: G2Element = AugSchemeMPL.aggregate([sig_farmer, sign_response.message_signatures[0][1]])
+        # The pool verifies the aggregate signature anyway, only pay for the pairing check when debugging
+        if __debug__ and self.log.isEnabledFor(logging.DEBUG):
+            assert agg_pk == new_proof_of_space.proof.plot_public_key
+            assert await loop.run_in_executor(None, AugSchemeMPL.verify, agg_pk, m_to_sign, plot_signature)
+        authentication_signature: G2Element = await auth_sig_future
 
-        assert plot_signature is not None
         agg_sig: G2Element = AugSchemeMPL.aggregate([plot_signature, authentication_signature])
 
         submit_partial = SubmitPartialOG(payload, agg_sig)
         self.log.info(f"Submitting partial to pool {self.pool_url}")
-        self.last_partial_submit_time = time.time()
+        self.last_partial_submit_time = time.monotonic()
 
-        submit_response: Dict
+        submit_response: SubmitResponseOG
         try:
             submit_response = await self.pool_client.submit_partial(submit_partial)
         except Exception as e:
@@ -259,23 +299,23 @@ class PoolWorker:
             return
 
         self.log.info(f"Pool response: {submit_response}")
-        if "new_difficulty" in submit_response:
-            new_difficulty = submit_response["new_difficulty"]
-            if new_difficulty != self.pool_difficulty:
-                self.pool_difficulty = new_difficulty
-                self.log.info(f"Pool difficulty changed to {self.pool_difficulty}")
-
-        if "partial_target_time" in submit_response:
-            target_time = submit_response["partial_target_time"]
-            if target_time >= 0 and target_time != self.pool_partial_target_time:
-                self.pool_partial_target_time = target_time
-                self.log.info(f"Pool partial target time changed to {self.pool_partial_target_time}")
-
-        if "error_code" in submit_response:
-            if submit_response["error_code"] == 5:
+        new_difficulty = submit_response.get("new_difficulty")
+        target_time = submit_response.get("partial_target_time")
+        error_code = submit_response.get("error_code")
+
+        if new_difficulty is not None and new_difficulty != self.pool_difficulty:
+            self.pool_difficulty = new_difficulty
+            self.log.info(f"Pool difficulty changed to {self.pool_difficulty}")
+
+        if target_time is not None and target_time >= 0 and target_time != self.pool_partial_target_time:
+            self.pool_partial_target_time = target_time
+            self.log.info(f"Pool partial target time changed to {self.pool_partial_target_time}")
+
+        if error_code is not None:
+            if error_code == 5:
                 self.log.warning(f"Partial difficulty too low")
             else:
                 self.farmer.log.error(
-                    f"Error in pooling: {submit_response['error_code']}, "
-                    f"{submit_response['error_message']}"
+                    f"Error in pooling: {error_code}, "
+                    f"{submit_response.get('error_message')}"
                 )
@@ -33,6 +33,7 @@ dependencies = [
     "typing-extensions==4.3.0",  # typing backports like Protocol and TypedDict
     "zstd==1.5.0.4",
     "packaging==21.3",
+    "orjson==3.8.3",  # Fast JSON encoding and decoding for pool partials
 ]
 
 upnp_dependencies = [
@@ -0,0 +1,24 @@
+from types import ModuleType, SimpleNamespace
+from typing import Any, Callable
+
+import pytest
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture(scope="function")
+def patch_clock(monkeypatch: Any) -> Callable[[ModuleType], FakeClock]:
+    """Replace the `time` module used by the given module with a `FakeClock` that only moves when told to."""
+
+    def patch(module: ModuleType) -> FakeClock:
+        fake_clock = FakeClock()
+        monkeypatch.setattr(module, "time", SimpleNamespace(monotonic=fake_clock.monotonic))
+        return fake_clock
+
+    return patch
@@ -0,0 +1,145 @@
+import ssl
+from types import ModuleType, SimpleNamespace
+from typing import Any, Callable, List, Optional
+
+import pytest
+from aiohttp import ClientConnectionError
+
+from chia.farmer.og_pooling import pool_api_client
+from chia.farmer.og_pooling.pool_api_client import (
+    PARTIAL_MAX_ATTEMPTS,
+    PARTIAL_RETRY_BASE_DELAY,
+    PARTIAL_RETRY_JITTER,
+    PoolApiClient,
+    post_partial,
+)
+from tests.farmer_harvester.conftest import FakeClock
+
+
+class FakeResponse:
+    def __init__(self, ok: bool, status: int = 200, body: bytes = b"{}") -> None:
+        self.ok = ok
+        self.status = status
+        self.body = body
+
+    async def read(self) -> bytes:
+        return self.body
+
+
+class FakeRequest:
+    def __init__(self, response: Optional[FakeResponse]) -> None:
+        self.response = response
+
+    async def __aenter__(self) -> FakeResponse:
+        if self.response is None:
+            raise ClientConnectionError("connection refused")
+        return self.response
+
+    async def __aexit__(self, *args: Any) -> None:
+        pass
+
+
+class FakeSession:
+    """
+    Returns `response` for every post, or fails to connect if it's None. Every post advances the clock by `step`.
+    """
+
+    def __init__(self, clock: FakeClock, response: Optional[FakeResponse] = None, step: float = 0.0) -> None:
+        self.clock = clock
+        self.response = response
+        self.step = step
+        self.calls: List[Any] = []
+
+    def post(self, url: str, *, data: Any = None, headers: Any = None, **kwargs: Any) -> FakeRequest:
+        self.calls.append((url, data, headers))
+        self.clock.now += self.step
+        return FakeRequest(self.response)
+
+
+@pytest.fixture(scope="function")
+def clock(patch_clock: Callable[[ModuleType], FakeClock]) -> FakeClock:
+    return patch_clock(pool_api_client)
+
+
+@pytest.fixture(scope="function")
+def sleeps(monkeypatch: Any, clock: FakeClock) -> List[float]:
+    delays: List[float] = []
+
+    async def fake_sleep(delay: float) -> None:
+        delays.append(delay)
+        clock.now += delay
+
+    monkeypatch.setattr(pool_api_client, "asyncio", SimpleNamespace(sleep=fake_sleep))
+    return delays
+
+
+class TestPostPartial:
+    @pytest.mark.asyncio
+    async def test_success(self, clock: FakeClock, sleeps: List[float]) -> None:
+        session = FakeSession(clock, FakeResponse(ok=True, body=b'{"new_difficulty": 10}'))
+        response = await post_partial(session, "https://pool.example.com/partial", json={"a": 1})  # type: ignore
+        assert response == {"new_difficulty": 10}
+        assert len(session.calls) == 1
+        _, data, headers = session.calls[0]
+        assert data == b'{"a":1}'
+        assert headers["Content-Type"] == "application/json"
+        assert sleeps == []
+
+    @pytest.mark.asyncio
+    async def test_attempts_are_capped(self, clock: FakeClock, sleeps: List[float]) -> None:
+        session = FakeSession(clock)
+        with pytest.raises(ClientConnectionError, match="connection refused"):
+            await post_partial(session, "https://pool.example.com/partial", json={})  # type: ignore
+        assert len(session.calls) == PARTIAL_MAX_ATTEMPTS
+        assert len(sleeps) == PARTIAL_MAX_ATTEMPTS - 1
+
+    @pytest.mark.asyncio
+    async def test_sleep_bounds(self, clock: FakeClock, sleeps: List[float]) -> None:
+        session = FakeSession(clock)
+        with pytest.raises(ClientConnectionError):
+            await post_partial(session, "https://pool.example.com/partial", json={})  # type: ignore
+        for attempt, delay in enumerate(sleeps):
+            lower = PARTIAL_RETRY_BASE_DELAY * (2**attempt)
+            assert lower <= delay <= lower * (1 + PARTIAL_RETRY_JITTER)
+
+    @pytest.mark.asyncio
+    async def test_sleep_clamped_to_ttl(self, clock: FakeClock, sleeps: List[float]) -> None:
+        # The connection attempt takes 22.75 seconds, leaving only 0.25 seconds of the 23 second ttl to back off
+        session = FakeSession(clock, step=22.75)
+        with pytest.raises(ClientConnectionError):
+            await post_partial(session, "https://pool.example.com/partial", json={})  # type: ignore
+        assert len(session.calls) == 1
+        assert len(sleeps) == 1
+        assert sleeps[0] == 0.25
+
+    @pytest.mark.asyncio
+    async def test_no_retry_on_http_error(self, clock: FakeClock, sleeps: List[float]) -> None:
+        session = FakeSession(clock, FakeResponse(ok=False, status=500))
+        with pytest.raises(ClientConnectionError, match="500"):
+            await post_partial(session, "https://pool.example.com/partial", json={})  # type: ignore
+        assert len(session.calls) == 1
+        assert sleeps == []
+
+
+class TestPoolApiClient:
+    @pytest.mark.asyncio
+    async def test_ssl_context_failure_is_retried(self, monkeypatch: Any) -> None:
+        attempts: List[int] = []
+
+        def failing_once_ssl_context() -> ssl.SSLContext:
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise FileNotFoundError("cacert.pem")
+            return ssl.create_default_context()
+
+        monkeypatch.setattr(pool_api_client, "cached_ssl_context", failing_once_ssl_context)
+        # Building the client must not touch the CA bundle, errors surface from the guarded request paths instead
+        client = PoolApiClient("https://pool.example.com", pool_api_client.partial_log)
+        assert attempts == []
+        with pytest.raises(FileNotFoundError):
+            await client._get_session()
+        session = await client._get_session()
+        assert not session.closed
+        assert len(attempts) == 2
+        await client.close()
+        assert session.closed
@@ -0,0 +1,96 @@
+from types import ModuleType, SimpleNamespace
+from typing import Callable
+
+import pytest
+
+from chia.consensus.default_constants import DEFAULT_CONSTANTS
+from chia.farmer.og_pooling import pool_worker
+from chia.farmer.og_pooling.pool_worker import HARVESTER_STALE_TIMEOUT, PoolWorker
+from chia.types.blockchain_format.sized_bytes import bytes32
+from tests.farmer_harvester.conftest import FakeClock
+
+
+@pytest.fixture(scope="function")
+def clock(patch_clock: Callable[[ModuleType], FakeClock]) -> FakeClock:
+    return patch_clock(pool_worker)
+
+
+def create_pool_worker() -> PoolWorker:
+    farmer = SimpleNamespace(
+        config={"og_pooling": {"enabled": True, "pool_url": "https://pool.example.com"}},
+        constants=DEFAULT_CONSTANTS,
+        _shut_down=False,
+    )
+    worker = PoolWorker(None, farmer)
+    # Any client marks the worker as connected to the pool
+    worker.pool_client = SimpleNamespace()  # type: ignore[assignment]
+    return worker
+
+
+def farming_info(worker: PoolWorker, node_id: bytes32, total_plots: int) -> None:
+    worker.farming_info(
+        SimpleNamespace(total_plots=total_plots),  # type: ignore[arg-type]
+        SimpleNamespace(peer_node_id=node_id),  # type: ignore[arg-type]
+    )
+
+
+class TestPoolWorkerTotalPlots:
+    @pytest.mark.asyncio
+    async def test_harvester_count_changes(self, clock: FakeClock) -> None:
+        worker = create_pool_worker()
+        harvester = bytes32(b"\x01" * 32)
+        farming_info(worker, harvester, 10)
+        assert worker.total_plots == 10
+        farming_info(worker, harvester, 10)
+        assert worker.total_plots == 10
+        farming_info(worker, harvester, 15)
+        assert worker.total_plots == 15
+        farming_info(worker, harvester, 7)
+        assert worker.total_plots == 7
+
+    @pytest.mark.asyncio
+    async def test_two_harvesters(self, clock: FakeClock) -> None:
+        worker = create_pool_worker()
+        harvester_1 = bytes32(b"\x01" * 32)
+        harvester_2 = bytes32(b"\x02" * 32)
+        farming_info(worker, harvester_1, 10)
+        farming_info(worker, harvester_2, 20)
+        assert worker.total_plots == 30
+        farming_info(worker, harvester_2, 25)
+        assert worker.total_plots == 35
+        farming_info(worker, harvester_1, 0)
+        assert worker.total_plots == 25
+
+    @pytest.mark.asyncio
+    async def test_prune_stale_harvester(self, clock: FakeClock) -> None:
+        worker = create_pool_worker()
+        harvester_1 = bytes32(b"\x01" * 32)
+        harvester_2 = bytes32(b"\x02" * 32)
+        farming_info(worker, harvester_1, 10)
+        farming_info(worker, harvester_2, 20)
+
+        # Only the second harvester keeps reporting
+        clock.now += HARVESTER_STALE_TIMEOUT / 2
+        farming_info(worker, harvester_2, 20)
+        worker._prune_stale_harvesters()
+        assert worker.total_plots == 30
+
+        clock.now += HARVESTER_STALE_TIMEOUT / 2 + 1
+        worker._prune_stale_harvesters()
+        assert worker.total_plots == 20
+        assert worker.harvester_plots == {harvester_2: 20}
+        assert set(worker.harvester_last_seen) == {harvester_2}
+
+        # A pruned harvester that reports again is counted from scratch
+        farming_info(worker, harvester_1, 12)
+        assert worker.total_plots == 32
+
+    @pytest.mark.asyncio
+    async def test_ignored_during_shutdown(self, clock: FakeClock) -> None:
+        worker = create_pool_worker()
+        harvester = bytes32(b"\x01" * 32)
+        farming_info(worker, harvester, 10)
+        worker.farmer._shut_down = True
+        farming_info(worker, harvester, 15)
+        assert worker.total_plots == 10
+        assert worker.harvester_plots == {harvester: 10}